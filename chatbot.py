@@ -1,71 +1,161 @@
 """
 Chatbot - FastAPI endpoints for wardrobe-based chatbot
 """
+import asyncio
 import os
 import re
-import shutil
-from typing import Optional, List, Dict, Any
+import sys
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Optional, List, Dict, NamedTuple
 from pathlib import Path
 import uuid
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+import aiofiles
+import msgspec
+from fastapi import Depends, FastAPI, HTTPException, UploadFile, File, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
-from wardrobe_manager import WardrobeManager
+from wardrobe_manager import WardrobeManager, trie_pattern
+
+try:
+    import ahocorasick
+except ImportError:
+    # pyahocorasick is optional; intent matching falls back to plain substring scans
+    ahocorasick = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the wardrobe in the background so the server starts accepting requests right away;
+    compact its metadata log on shutdown
+    """
+    asyncio.get_running_loop().run_in_executor(None, _load_wardrobe)
+    yield
+    # Fold the append-only metadata log back into metadata.json on shutdown
+    if _wardrobe_manager is not None:
+        _wardrobe_manager.close()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Wardrobe Chatbot API",
     description="AI-powered wardrobe and styling chatbot service",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Add CORS middleware
+# Add CORS middleware (local dev servers and Vercel deployments; no cookies, so no credentials)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3003", 
-        "http://localhost:3001", 
-        "http://localhost:3000",
-        "https://frontend-8zs411l6d-karan-jajus-projects.vercel.app",
-        "https://*.vercel.app",
-        "*"  # Allow all origins for production
-    ],
-    allow_credentials=True,
+    allow_origin_regex=r"^(https://[\w-]+\.vercel\.app|http://localhost:300[0-3])$",
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Initialize wardrobe manager
-wardrobe_manager = WardrobeManager("./wardrobe")
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZip API responses, but pass static images through since they are already compressed"""
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/static/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress wardrobe listings and other JSON responses above ~512 bytes
+app.add_middleware(JSONGZipMiddleware, minimum_size=512)
+
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Only Linux can sendfile into a regular file (macOS/BSD require a socket destination)
+USE_SENDFILE = sys.platform.startswith("linux")
+
+# Leading bytes identifying each accepted image format
+IMAGE_HEADER_SIZE = 12
+IMAGE_MAGIC_NUMBERS = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+
+def _sniff_image_extension(header: bytes) -> Optional[str]:
+    """Detect the image format from its magic bytes, ignoring the client's Content-Type and filename"""
+    for magic, extension in IMAGE_MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return extension
+    # WEBP is a RIFF container: "RIFF" <size> "WEBP"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+# Wardrobe directory, created once at startup and shared by every endpoint
+WARDROBE_DIR = Path("./wardrobe")
+WARDROBE_DIR.mkdir(exist_ok=True)
+
+# Wardrobe manager, created lazily on first use (loading metadata scans the folder once)
+_wardrobe_manager: Optional[WardrobeManager] = None
+_wardrobe_manager_lock = threading.Lock()
+
+def get_wardrobe_manager() -> WardrobeManager:
+    """Get the shared wardrobe manager, creating it on first call"""
+    global _wardrobe_manager
+    if _wardrobe_manager is None:
+        with _wardrobe_manager_lock:
+            if _wardrobe_manager is None:
+                _wardrobe_manager = WardrobeManager(str(WARDROBE_DIR))
+    return _wardrobe_manager
+
+async def wardrobe_manager_dependency() -> WardrobeManager:
+    """FastAPI dependency; only the first call pays for loading, and it does so off the event loop"""
+    if _wardrobe_manager is not None:
+        return _wardrobe_manager
+    return await run_in_threadpool(get_wardrobe_manager)
+
+def _load_wardrobe():
+    """Initialize wardrobe metadata on startup"""
+    try:
+        items_count = get_wardrobe_manager().count
+        print(f"Wardrobe initialized with {items_count} items")
+    except Exception as e:
+        print(f"Error initializing wardrobe: {e}")
 
 # Mount static files for serving images
-app.mount("/static", StaticFiles(directory="wardrobe"), name="static")
+app.mount("/static", StaticFiles(directory=WARDROBE_DIR), name="static")
 
 # Root endpoint for health checks
 @app.get("/")
-async def root():
+async def root(wardrobe_manager: WardrobeManager = Depends(wardrobe_manager_dependency)):
     """Root endpoint for Railway healthcheck"""
     return {
         "status": "healthy",
         "service": "AI Stylist Wardrobe API",
         "version": "1.0.0",
-        "wardrobe_items": len(wardrobe_manager.get_all_items())
+        "wardrobe_items": wardrobe_manager.count
     }
 
-# Pydantic models
-class ChatRequest(BaseModel):
+# Chat models (msgspec: the chat path decodes and encodes these on every message)
+class ChatRequest(msgspec.Struct):
     message: str
     user_id: Optional[str] = None
 
-class ChatResponse(BaseModel):
+class ChatResponse(msgspec.Struct):
     response: str
     outfit_suggestion: Optional[Dict] = None
     items: Optional[List[Dict]] = None
 
+# JSON schemas for the chat models, so /chat stays documented in OpenAPI
+_, CHAT_SCHEMAS = msgspec.json.schema_components([ChatRequest, ChatResponse])
+CHAT_REQUEST_DECODER = msgspec.json.Decoder(ChatRequest)
+CHAT_RESPONSE_ENCODER = msgspec.json.Encoder()
+
+# Pydantic models (OpenAPI documentation only)
 class UploadResponse(BaseModel):
     message: str
     item: Dict
@@ -75,6 +165,31 @@ class WardrobeResponse(BaseModel):
     items: List[Dict]
     total_count: int
 
+# Conditional request helpers
+WARDROBE_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
+def _wardrobe_etag(wardrobe_manager: WardrobeManager) -> str:
+    """Weak ETag for wardrobe listings, derived from the last metadata write and item count"""
+    return f'W/"{wardrobe_manager.last_saved_ns()}-{wardrobe_manager.count}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag (weak comparison)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
+def _cache_headers(etag: str) -> Dict[str, str]:
+    """Validator headers sent with every wardrobe read"""
+    return {"ETag": etag, "Cache-Control": WARDROBE_CACHE_CONTROL}
+
+def _not_modified(etag: str) -> Response:
+    """Build an empty 304 response carrying the validator headers"""
+    return Response(status_code=304, headers=_cache_headers(etag))
+
 # API Endpoints
 
 @app.get("/health")
@@ -82,32 +197,61 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "ok", "service": "wardrobe-chatbot"}
 
-@app.get("/wardrobe", response_model=WardrobeResponse)
-async def get_wardrobe():
+@app.get("/wardrobe", responses={200: {"model": WardrobeResponse}})
+async def get_wardrobe(
+    request: Request,
+    wardrobe_manager: WardrobeManager = Depends(wardrobe_manager_dependency)
+):
     """Get all wardrobe items"""
     try:
+        etag = _wardrobe_etag(wardrobe_manager)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        # Documented as WardrobeResponse, but skip re-validating every item on the way out
         items = wardrobe_manager.get_all_items()
-        return WardrobeResponse(items=items, total_count=len(items))
+        return ORJSONResponse({"items": items, "total_count": len(items)}, headers=_cache_headers(etag))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get wardrobe: {str(e)}")
 
 @app.get("/wardrobe/category/{category}")
-async def get_items_by_category(category: str):
+async def get_items_by_category(
+    category: str,
+    request: Request,
+    wardrobe_manager: WardrobeManager = Depends(wardrobe_manager_dependency)
+):
     """Get items by category"""
     try:
+        etag = _wardrobe_etag(wardrobe_manager)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        # Item dicts come straight from WardrobeManager, so hand them to orjson as-is
         items = wardrobe_manager.get_items_by_category(category)
-        return {"items": items, "category": category, "count": len(items)}
+        return ORJSONResponse(
+            {"items": items, "category": category, "count": len(items)},
+            headers=_cache_headers(etag)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get items by category: {str(e)}")
 
 @app.get("/wardrobe/item/{item_id}")
-async def get_item(item_id: str):
+async def get_item(
+    item_id: str,
+    request: Request,
+    response: Response,
+    wardrobe_manager: WardrobeManager = Depends(wardrobe_manager_dependency)
+):
     """Get specific item by ID"""
     try:
-        items = wardrobe_manager.get_all_items()
-        item = next((item for item in items if item["id"] == item_id), None)
+        etag = _wardrobe_etag(wardrobe_manager)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        
+        item = wardrobe_manager.get_item(item_id)
         if not item:
             raise HTTPException(status_code=404, detail="Item not found")
+        response.headers.update(_cache_headers(etag))
         return item
     except HTTPException:
         raise
@@ -116,80 +260,111 @@ async def get_item(item_id: str):
 
 @app.get("/wardrobe/image/{filename}")
 async def get_image(filename: str):
-    """Serve wardrobe images"""
-    try:
-        file_path = Path("wardrobe") / filename
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="Image not found")
-        return FileResponse(file_path)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to serve image: {str(e)}")
+    """Redirect to the static mount, which handles Last-Modified/ETag and 304s for images"""
+    return RedirectResponse(f"/static/{quote(filename)}", status_code=308)
 
 @app.post("/regenerate-metadata")
-async def regenerate_metadata():
-    """Regenerate metadata for all wardrobe items with improved analysis"""
+async def regenerate_metadata(wardrobe_manager: WardrobeManager = Depends(wardrobe_manager_dependency)):
+    """Re-analyze wardrobe items whose image changed since the last analysis"""
     try:
-        wardrobe_manager.regenerate_metadata()
+        # Re-analysis is CPU-bound; keep it off the event loop
+        reanalyzed, skipped = await asyncio.get_running_loop().run_in_executor(
+            None, wardrobe_manager.regenerate_metadata
+        )
         
         return {
             "success": True,
             "message": "Metadata regenerated successfully",
-            "total_items": len(wardrobe_manager.get_all_items())
+            "total_items": wardrobe_manager.count,
+            "reanalyzed": reanalyzed,
+            "skipped": skipped
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to regenerate metadata: {str(e)}")
 
-@app.post("/upload", response_model=UploadResponse)
+def _sendfile_to_path(src_fd: int, dst_path: Path) -> None:
+    """Copy a spooled upload to dst_path with os.sendfile (no userspace buffers)"""
+    dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        offset = 0
+        while sent := os.sendfile(dst_fd, src_fd, offset, UPLOAD_CHUNK_SIZE):
+            offset += sent
+    finally:
+        os.close(dst_fd)
+
+@app.post("/upload", responses={200: {"model": UploadResponse}})
 async def upload_image(
     file: UploadFile = File(...),
-    category: Optional[str] = Form(None)
+    category: Optional[str] = Form(None),
+    wardrobe_manager: WardrobeManager = Depends(wardrobe_manager_dependency)
 ):
     """Upload new wardrobe item with enhanced analysis"""
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
+        # Validate file type from its magic bytes before anything touches the disk
+        header = await file.read(IMAGE_HEADER_SIZE)
+        file_extension = _sniff_image_extension(header)
+        if not file_extension:
+            raise HTTPException(status_code=400, detail="Unsupported image format")
         
         # Generate unique filename
-        file_extension = Path(file.filename).suffix
         unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = Path("wardrobe") / unique_filename
+        file_path = WARDROBE_DIR / unique_filename
         
-        # Ensure wardrobe directory exists
-        file_path.parent.mkdir(exist_ok=True)
-        
-        # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Add to wardrobe metadata with analysis
-        item_data = wardrobe_manager.add_new_item(unique_filename, file_path)
+        if USE_SENDFILE and getattr(file.file, "_rolled", False):
+            # Large uploads are already spooled to a temp file, so copy them in-kernel
+            await asyncio.get_running_loop().run_in_executor(
+                None, _sendfile_to_path, file.file.fileno(), file_path
+            )
+        else:
+            # Stream uploaded file to disk without blocking the event loop
+            async with aiofiles.open(file_path, "wb") as buffer:
+                await buffer.write(header)
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await buffer.write(chunk)
         
         # Override category if provided by user
+        category_override = None
         if category and category.strip().lower() != 'unknown':
-            item_data["category"] = category.strip().lower()
-            # Update description with new category
-            item_data["description"] = f"{item_data['color'].title()} {item_data['category']}"
-            wardrobe_manager._save_metadata()
+            category_override = category.strip().lower()
         
-        return UploadResponse(
-            message="File uploaded and analyzed successfully",
-            item=item_data,
-            filename=unique_filename
+        # Add to wardrobe metadata with analysis (CPU-bound, so run in the executor)
+        item_data = await asyncio.get_running_loop().run_in_executor(
+            None, wardrobe_manager.add_new_item, unique_filename, file_path, category_override
         )
         
+        return {
+            "message": "File uploaded and analyzed successfully",
+            "item": item_data,
+            "filename": unique_filename
+        }
+        
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+@app.post(
+    "/chat",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": CHAT_SCHEMAS["ChatRequest"]}}
+        }
+    },
+    responses={200: {"content": {"application/json": {"schema": CHAT_SCHEMAS["ChatResponse"]}}}}
+)
+async def chat_endpoint(
+    request: Request,
+    wardrobe_manager: WardrobeManager = Depends(wardrobe_manager_dependency)
+):
     """Main chat endpoint for outfit suggestions"""
     try:
-        message = request.message.lower().strip()
+        chat_request = CHAT_REQUEST_DECODER.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid chat request: {str(e)}")
+    
+    try:
+        message = chat_request.message.lower().strip()
         
         # Parse user intent from message
         intent = parse_user_intent(message)
@@ -198,12 +373,12 @@ async def chat_endpoint(request: ChatRequest):
         outfit_suggestion = None
         items = None
         
-        if intent["type"] == "outfit_request":
+        if intent.type == "outfit_request":
             # Generate outfit suggestion
             preferences = {
-                "category": intent.get("category"),
-                "color": intent.get("color"),
-                "occasion": intent.get("occasion")
+                "category": intent.category,
+                "color": intent.color,
+                "occasion": intent.occasion
             }
             
             outfit_suggestion = wardrobe_manager.suggest_outfit(preferences)
@@ -214,7 +389,7 @@ async def chat_endpoint(request: ChatRequest):
             else:
                 response_text = "I don't have enough items in your wardrobe to suggest a complete outfit. Try uploading some more clothes!"
                 
-        elif intent["type"] == "search":
+        elif intent.type == "search":
             # Search for specific items
             search_results = wardrobe_manager.search_items(message)
             if search_results:
@@ -223,90 +398,150 @@ async def chat_endpoint(request: ChatRequest):
             else:
                 response_text = "I couldn't find any items matching your search. Try different keywords or upload new items!"
                 
-        elif intent["type"] == "category_browse":
+        elif intent.type == "category_browse":
             # Browse by category
-            category_items = wardrobe_manager.get_items_by_category(intent["category"])
+            category_items = wardrobe_manager.get_items_by_category(intent.category)
             if category_items:
-                response_text = f"Here are all the {intent['category']} items in your wardrobe:"
+                response_text = f"Here are all the {intent.category} items in your wardrobe:"
                 items = category_items
             else:
-                response_text = f"You don't have any {intent['category']} items yet. Would you like to upload some?"
+                response_text = f"You don't have any {intent.category} items yet. Would you like to upload some?"
                 
         else:
             # General conversation
             response_text = generate_general_response(message)
         
-        return ChatResponse(
+        chat_response = ChatResponse(
             response=response_text,
             outfit_suggestion=outfit_suggestion,
             items=items
         )
+        return Response(CHAT_RESPONSE_ENCODER.encode(chat_response), media_type="application/json")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
-def parse_user_intent(message: str) -> Dict[str, Any]:
-    """Parse user message to understand intent"""
-    intent = {"type": "general"}
-    
-    # Keywords for different intents
-    outfit_keywords = ["outfit", "what to wear", "suggest", "recommendation", "style", "dress", "clothing combination"]
-    search_keywords = ["find", "search", "show me", "do you have", "looking for"]
-    category_keywords = {
-        "shirt": ["shirt", "shirts"],
-        "tshirt": ["tshirt", "t-shirt", "tee", "tees"],
-        "jeans": ["jeans", "denim"],
-        "trousers": ["trousers", "pants", "chinos"],
-        "shoes": ["shoes", "sneakers", "boots", "footwear"],
-        "suit": ["suit", "suits", "formal", "blazer"]
-    }
-    
-    color_keywords = ["red", "blue", "green", "yellow", "black", "white", "gray", "grey", "pink", "purple", "orange", "brown"]
-    occasion_keywords = {
-        "formal": ["formal", "office", "work", "business", "meeting"],
-        "casual": ["casual", "relaxed", "comfortable", "everyday"],
-        "party": ["party", "celebration", "event", "night out"],
-        "sport": ["sport", "gym", "exercise", "athletic"]
+# Keywords for different intents
+OUTFIT_KEYWORDS = ["outfit", "what to wear", "suggest", "recommendation", "style", "dress", "clothing combination"]
+SEARCH_KEYWORDS = ["find", "search", "show me", "do you have", "looking for"]
+CATEGORY_KEYWORDS = {
+    "shirt": ["shirt", "shirts"],
+    "tshirt": ["tshirt", "t-shirt", "tee", "tees"],
+    "jeans": ["jeans", "denim"],
+    "trousers": ["trousers", "pants", "chinos"],
+    "shoes": ["shoes", "sneakers", "boots", "footwear"],
+    "suit": ["suit", "suits", "formal", "blazer"]
+}
+COLOR_KEYWORDS = ["red", "blue", "green", "yellow", "black", "white", "gray", "grey", "pink", "purple", "orange", "brown"]
+OCCASION_KEYWORDS = {
+    "formal": ["formal", "office", "work", "business", "meeting"],
+    "casual": ["casual", "relaxed", "comfortable", "everyday"],
+    "party": ["party", "celebration", "event", "night out"],
+    "sport": ["sport", "gym", "exercise", "athletic"]
+}
+
+# Keyword sets per bucket; dict/list order sets precedence when several values match
+OUTFIT_KEYS = frozenset(OUTFIT_KEYWORDS)
+SEARCH_KEYS = frozenset(SEARCH_KEYWORDS)
+CATEGORY_KEYS = {category: frozenset(keywords) for category, keywords in CATEGORY_KEYWORDS.items()}
+COLOR_KEYS = {color: frozenset([color]) for color in COLOR_KEYWORDS}
+OCCASION_KEYS = {occasion: frozenset(keywords) for occasion, keywords in OCCASION_KEYWORDS.items()}
+ANY_CATEGORY_KEYS = frozenset().union(*CATEGORY_KEYS.values())
+ANY_COLOR_KEYS = frozenset(COLOR_KEYWORDS)
+ANY_OCCASION_KEYS = frozenset().union(*OCCASION_KEYS.values())
+INTENT_KEYWORDS = OUTFIT_KEYS | SEARCH_KEYS | ANY_CATEGORY_KEYS | ANY_COLOR_KEYS | ANY_OCCASION_KEYS
+
+def _build_intent_automaton():
+    """Compile all intent keywords into a single Aho-Corasick automaton"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in INTENT_KEYWORDS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+INTENT_AUTOMATON = _build_intent_automaton()
+
+def _build_intent_regex():
+    """Compile all intent keywords into one regex for when pyahocorasick is unavailable.
+
+    The trie alternation sits inside a lookahead so every position is tried (keywords may
+    overlap, e.g. "tshirt" also contains "shirt"), and the longest keyword wins. Each keyword
+    also reports the shorter keywords it starts with, which the longer match hides.
+    """
+    pattern = re.compile("(?=(" + trie_pattern(INTENT_KEYWORDS) + "))")
+    prefixes = {
+        keyword: tuple(prefix for prefix in INTENT_KEYWORDS if keyword.startswith(prefix))
+        for keyword in INTENT_KEYWORDS
     }
+    return pattern, prefixes
+
+INTENT_REGEX, INTENT_REGEX_PREFIXES = _build_intent_regex()
+
+def _match_intent_keywords(message: str) -> frozenset:
+    """Scan the message once and return every intent keyword it contains"""
+    if INTENT_AUTOMATON is not None:
+        return frozenset(keyword for _, keyword in INTENT_AUTOMATON.iter(message))
+    return frozenset(
+        keyword
+        for match in INTENT_REGEX.finditer(message)
+        for keyword in INTENT_REGEX_PREFIXES[match.group(1)]
+    )
+
+def _first_bucket(matched: frozenset, buckets: Dict[str, frozenset], any_keys: frozenset) -> Optional[str]:
+    """Return the first bucket whose keywords intersect the matched keywords"""
+    if matched.isdisjoint(any_keys):
+        return None
+    return next((name for name, keys in buckets.items() if not matched.isdisjoint(keys)), None)
+
+# Only messages up to this length are memoized, so the caches stay small under arbitrary input
+CACHED_MESSAGE_LENGTH = 256
+
+class UserIntent(NamedTuple):
+    type: str = "general"
+    category: Optional[str] = None
+    color: Optional[str] = None
+    occasion: Optional[str] = None
+
+def parse_user_intent(message: str) -> UserIntent:
+    """Parse user message to understand intent (cached for short messages, which repeat across users)"""
+    if len(message) <= CACHED_MESSAGE_LENGTH:
+        return _parse_user_intent_cached(message)
+    return _parse_user_intent(message)
+
+def _parse_user_intent(message: str) -> UserIntent:
+    matched = _match_intent_keywords(message)
     
-    # Check for outfit request
-    if any(keyword in message for keyword in outfit_keywords):
-        intent["type"] = "outfit_request"
-        
-        # Check for specific category mention
-        for category, keywords in category_keywords.items():
-            if any(keyword in message for keyword in keywords):
-                intent["category"] = category
-                break
-        
-        # Check for color preference
-        for color in color_keywords:
-            if color in message:
-                intent["color"] = color
-                break
-        
-        # Check for occasion
-        for occasion, keywords in occasion_keywords.items():
-            if any(keyword in message for keyword in keywords):
-                intent["occasion"] = occasion
-                break
+    # Check for outfit request, with optional category, color and occasion
+    if not matched.isdisjoint(OUTFIT_KEYS):
+        return UserIntent(
+            type="outfit_request",
+            category=_first_bucket(matched, CATEGORY_KEYS, ANY_CATEGORY_KEYS),
+            color=_first_bucket(matched, COLOR_KEYS, ANY_COLOR_KEYS),
+            occasion=_first_bucket(matched, OCCASION_KEYS, ANY_OCCASION_KEYS)
+        )
     
     # Check for search intent
-    elif any(keyword in message for keyword in search_keywords):
-        intent["type"] = "search"
+    if not matched.isdisjoint(SEARCH_KEYS):
+        return UserIntent(type="search")
     
     # Check for category browsing
-    else:
-        for category, keywords in category_keywords.items():
-            if any(keyword in message for keyword in keywords):
-                intent["type"] = "category_browse"
-                intent["category"] = category
-                break
+    category = _first_bucket(matched, CATEGORY_KEYS, ANY_CATEGORY_KEYS)
+    if category:
+        return UserIntent(type="category_browse", category=category)
     
-    return intent
+    return UserIntent()
+
+_parse_user_intent_cached = lru_cache(maxsize=4096)(_parse_user_intent)
 
 def generate_general_response(message: str) -> str:
-    """Generate response for general conversation"""
+    """Generate response for general conversation (cached for short messages)"""
+    if len(message) <= CACHED_MESSAGE_LENGTH:
+        return _generate_general_response_cached(message)
+    return _generate_general_response(message)
+
+def _generate_general_response(message: str) -> str:
     greetings = ["hi", "hello", "hey", "good morning", "good afternoon", "good evening"]
     thanks = ["thank", "thanks", "appreciate"]
     help_requests = ["help", "how", "what can you do"]
@@ -330,18 +565,14 @@ Just tell me what you're looking for!"""
     else:
         return "I'm here to help with your wardrobe! You can ask me to suggest outfits, find specific items, or browse your clothing by category. What would you like to do?"
 
-# Initialize wardrobe on startup
-@app.on_event("startup")
-async def startup_event():
-    """Initialize wardrobe metadata on startup"""
-    try:
-        # This will scan the wardrobe folder and create/update metadata
-        wardrobe_manager._scan_wardrobe_folder()
-        items_count = len(wardrobe_manager.get_all_items())
-        print(f"Wardrobe initialized with {items_count} items")
-    except Exception as e:
-        print(f"Error initializing wardrobe: {e}")
+_generate_general_response_cached = lru_cache(maxsize=4096)(_generate_general_response)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("chatbot:app", host="0.0.0.0", port=8001, reload=True)
+    port = int(os.getenv("PORT", 8001))
+    if os.getenv("ENV") == "prod":
+        # Single worker: each WardrobeManager keeps its own item list and they would overwrite
+        # each other's metadata.json/metadata.jsonl; uvloop and httptools for raw throughput
+        uvicorn.run("chatbot:app", host="0.0.0.0", port=port, loop="uvloop", http="httptools")
+    else:
+        uvicorn.run("chatbot:app", host="0.0.0.0", port=port, reload=True)
@@ -24,16 +24,38 @@ export default async function handler(req, res) {
       return res.status(400).json({ error: 'Filename is required' });
     }
     
-    // Proxy the image request to the AI service
-    const response = await axios.get(`${AI_SERVICE_URL}/wardrobe/image/${filename}`, {
+    // Forward conditional headers so the AI service can answer with 304
+    const conditionalHeaders = {};
+    if (req.headers['if-none-match']) {
+      conditionalHeaders['If-None-Match'] = req.headers['if-none-match'];
+    }
+    if (req.headers['if-modified-since']) {
+      conditionalHeaders['If-Modified-Since'] = req.headers['if-modified-since'];
+    }
+
+    // Proxy the image request to the AI service's static file mount
+    const response = await axios.get(`${AI_SERVICE_URL}/static/${encodeURIComponent(filename)}`, {
       responseType: 'stream',
       timeout: 30000,
+      headers: conditionalHeaders,
+      validateStatus: (status) => status === 200 || status === 304,
     });
 
     // Set appropriate headers
+    res.setHeader('Cache-Control', 'public, max-age=86400'); // Cache for 1 day
+    if (response.headers['etag']) {
+      res.setHeader('ETag', response.headers['etag']);
+    }
+    if (response.headers['last-modified']) {
+      res.setHeader('Last-Modified', response.headers['last-modified']);
+    }
+
+    if (response.status === 304) {
+      return res.status(304).end();
+    }
+
     res.setHeader('Content-Type', response.headers['content-type'] || 'image/jpeg');
     res.setHeader('Content-Length', response.headers['content-length']);
-    res.setHeader('Cache-Control', 'public, max-age=86400'); // Cache for 1 day
 
     // Pipe the image data
     response.data.pipe(res);
@@ -3,55 +3,321 @@ Wardrobe Manager - Handles metadata creation, image scanning, and outfit suggest
 """
 import os
 import json
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import re
 from PIL import Image
-import colorsys
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Metadata (de)serialization straight to/from bytes, with orjson when it is installed
+if orjson is not None:
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj, newline: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE if newline else None)
+else:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj, newline: bool = False) -> bytes:
+        return json.dumps(obj).encode() + (b"\n" if newline else b"")
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+
+# Filename terms per category, in priority order (t-shirts before shirts, jeans before trousers)
+CATEGORY_TERMS = [
+    ('tshirt', ['tshirt', 't-shirt', 'tee']),
+    ('shirt', ['shirt', 'blouse']),
+    ('suit', ['suit', 'blazer', 'jacket', 'formal']),
+    ('jeans', ['jean', 'denim']),
+    ('trousers', ['trouser', 'pant', 'chino', 'slack']),
+    ('shoes', ['shoe', 'sneaker', 'boot', 'sandal', 'loafer', 'oxford', 'heel']),
+    ('dress', ['dress', 'gown']),
+    ('skirt', ['skirt']),
+    ('shorts', ['shorts']),
+    ('hoodie', ['hoodie', 'sweatshirt']),
+    ('sweater', ['sweater', 'pullover', 'cardigan']),
+]
+
+def trie_pattern(keywords) -> str:
+    """Build a regex alternation shaped like a trie, so each position branches on one character"""
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end-of-keyword marker
+    
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional group: prefer the longer keyword when a shorter one also ends here
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
+# Every category term, mapped to its category's priority (lower wins)
+CATEGORY_PRIORITY = {term: priority for priority, (_, terms) in enumerate(CATEGORY_TERMS) for term in terms}
+
+# Trie-shaped alternation of all category terms: a plain search rejects names with no term,
+# and the lookahead form reports every (possibly overlapping) term, e.g. "shirt" inside "sweatshirt"
+CATEGORY_REGEX = re.compile(trie_pattern(CATEGORY_PRIORITY))
+CATEGORY_TERMS_REGEX = re.compile("(?=(" + trie_pattern(CATEGORY_PRIORITY) + "))")
+
+def _classify_hsv(h: float, s: float, v: float) -> str:
+    """Name a color from its HSV values (h in degrees, s and v in 0-1)"""
+    # Enhanced color classification
+    
+    # Handle grayscale colors first
+    if s < 0.15:  # Low saturation = grayscale
+        if v < 0.2:
+            return "black"
+        elif v < 0.35:
+            return "dark gray"
+        elif v < 0.65:
+            return "gray"
+        elif v < 0.85:
+            return "light gray"
+        else:
+            return "white"
+    
+    # Handle very dark colors
+    if v < 0.25:
+        if s > 0.3:
+            if h < 30 or h > 330:
+                return "dark red"
+            elif h < 90:
+                return "dark brown"
+            elif h < 150:
+                return "dark green"
+            elif h < 210:
+                return "navy blue"
+            elif h < 270:
+                return "dark purple"
+            else:
+                return "dark red"
+        else:
+            return "black"
+    
+    # Handle bright/saturated colors
+    if s > 0.3:  # Colorful (not grayscale)
+        if h < 15 or h > 345:
+            if v > 0.8 and s > 0.6:
+                return "bright red"
+            elif v > 0.6:
+                return "red"
+            else:
+                return "dark red"
+        elif h < 25:
+            return "red-orange"
+        elif h < 45:
+            if v > 0.7:
+                return "orange"
+            else:
+                return "brown"
+        elif h < 65:
+            if v > 0.8:
+                return "yellow"
+            else:
+                return "olive"
+        elif h < 85:
+            return "yellow-green"
+        elif h < 125:
+            if v > 0.6:
+                return "green"
+            else:
+                return "dark green"
+        elif h < 155:
+            return "teal"
+        elif h < 175:
+            return "cyan"
+        elif h < 195:
+            return "light blue"
+        elif h < 225:
+            if v > 0.6:
+                return "blue"
+            else:
+                return "navy blue"
+        elif h < 245:
+            return "blue-purple"
+        elif h < 275:
+            if v > 0.6:
+                return "purple"
+            else:
+                return "dark purple"
+        elif h < 295:
+            return "magenta"
+        elif h < 315:
+            return "pink"
+        elif h < 330:
+            return "rose"
+        else:
+            return "red"
+    
+    # Handle desaturated but not grayscale colors
+    else:
+        if h < 30 or h > 330:
+            return "light pink"
+        elif h < 60:
+            return "beige"
+        elif h < 90:
+            return "khaki"
+        elif h < 150:
+            return "sage green"
+        elif h < 210:
+            return "powder blue"
+        elif h < 270:
+            return "lavender"
+        else:
+            return "light pink"
+
 class WardrobeManager:
     def __init__(self, wardrobe_path: str = "./wardrobe"):
         self.wardrobe_path = Path(wardrobe_path)
         self.metadata_file = self.wardrobe_path / "metadata.json"
+        # Append-only log of item writes since metadata.json was last compacted
+        self.log_file = self.wardrobe_path / "metadata.jsonl"
+        self._log = None
+        # Serializes writers: uploads and regeneration run on executor threads
+        self._write_lock = threading.RLock()
+        # Same list object as self.metadata["items"], re-bound whenever metadata is replaced
+        self._items: List[Dict] = []
+        self._by_id: Dict[str, Dict] = {}
+        self._by_category: Dict[str, List[Dict]] = {}
+        self._snapshot: Optional[Tuple[Dict, ...]] = None
+        # Struct-of-arrays view of the snapshot: (items, lowered colors, lowered search texts)
+        self._columns: Optional[Tuple[Tuple[Dict, ...], np.ndarray, np.ndarray]] = None
         self.metadata = self._load_or_create_metadata()
         
     def _load_or_create_metadata(self) -> Dict:
         """Load existing metadata or create new one by scanning wardrobe folder"""
         if self.metadata_file.exists():
-            with open(self.metadata_file, 'r') as f:
-                metadata = json.load(f)
+            metadata = _json_loads(self.metadata_file.read_bytes())
         else:
             metadata = {"items": []}
+        log_damaged = self._replay_log(metadata)
             
-        # Store metadata first, then scan for new items
+        # Store metadata first, then scan for new items if the folder changed since the last save
         self.metadata = metadata
-        self._scan_wardrobe_folder()
+        self._rebuild_indexes()
+        if log_damaged:
+            # Compact now so later appends don't land after (or glued onto) the bad line
+            self._save_metadata()
+        if self._folder_changed_since_save():
+            self._scan_wardrobe_folder()
         return self.metadata
     
+    def _rebuild_indexes(self):
+        """Rebind the items list and rebuild the id and category indexes from metadata"""
+        items = self.metadata.setdefault("items", [])
+        # Build into locals and swap each index in once, so lock-free readers never see it half full
+        by_category: Dict[str, List[Dict]] = {}
+        for item in items:
+            by_category.setdefault(item.get("category"), []).append(item)
+        self._items = items
+        self._by_id = {item["id"]: item for item in items}
+        self._by_category = by_category
+    
+    def _index_item(self, item: Dict):
+        """Add an item to the lookup indexes"""
+        self._by_id[item["id"]] = item
+        self._by_category.setdefault(item.get("category"), []).append(item)
+    
+    def _unindex_item(self, item: Dict):
+        """Remove an item from the lookup indexes"""
+        self._by_id.pop(item["id"], None)
+        self._by_category[item.get("category")].remove(item)
+    
+    def _replay_log(self, metadata: Dict) -> bool:
+        """Apply logged item writes on top of loaded metadata; the last write for an ID wins.
+        
+        Unparsable lines (e.g. a write torn by a crash) are skipped. Returns True if any were.
+        """
+        try:
+            with open(self.log_file, 'rb') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return False
+        
+        items = {item["id"]: item for item in metadata["items"]}
+        damaged = False
+        for line in lines:
+            try:
+                item = _json_loads(line)
+            except ValueError:
+                damaged = True
+                continue
+            items[item["id"]] = item
+        metadata["items"] = list(items.values())
+        return damaged
+    
+    def last_saved_ns(self) -> int:
+        """Most recent write to metadata.json or its log, in ns (0 if neither exists)"""
+        mtimes = [0]
+        for path in (self.metadata_file, self.log_file):
+            try:
+                mtimes.append(path.stat().st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return max(mtimes)
+    
+    def _folder_changed_since_save(self) -> bool:
+        """Check whether files were added to or removed from the wardrobe folder after metadata was saved"""
+        saved_mtime = self.last_saved_ns()
+        if not saved_mtime:
+            return True
+        return self.wardrobe_path.stat().st_mtime_ns >= saved_mtime
+    
     def _scan_wardrobe_folder(self):
         """Scan wardrobe folder and add new items to metadata"""
+        with self._write_lock:
+            self._scan_wardrobe_folder_locked()
+    
+    def _scan_wardrobe_folder_locked(self):
         if not self.wardrobe_path.exists():
             self.wardrobe_path.mkdir(parents=True)
             return
             
-        existing_files = {item["filename"] for item in self.metadata.get("items", [])}
-        image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+        existing_files = {item["filename"] for item in self._items}
+        new_files = []
         
-        for file_path in self.wardrobe_path.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in image_extensions:
-                filename = file_path.name
-                if filename not in existing_files:
-                    # Create new item metadata
-                    item_data = self._analyze_image(file_path)
-                    self.metadata["items"].append(item_data)
-                    
+        with os.scandir(self.wardrobe_path) as entries:
+            for entry in entries:
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    if entry.name not in existing_files:
+                        new_files.append((Path(entry.path), entry.stat()))
+        
+        if not new_files:
+            return
+        
+        # Create new item metadata
+        for item_data in self._analyze_images(new_files):
+            self._items.append(item_data)
+            self._index_item(item_data)
         self._save_metadata()
     
-    def _analyze_image(self, file_path: Path) -> Dict:
+    def _analyze_images(self, files: List[Tuple[Path, os.stat_result]]) -> List[Dict]:
+        """Analyze several images on a thread pool (PIL decoding and resizing release the GIL)"""
+        if len(files) == 1:
+            return [self._analyze_image(*files[0])]
+        with ThreadPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+            return list(executor.map(lambda file: self._analyze_image(*file), files))
+    
+    def _analyze_image(self, file_path: Path, stat: Optional[os.stat_result] = None) -> Dict:
         """Analyze image to extract metadata"""
         filename = file_path.name
+        if stat is None:
+            stat = file_path.stat()
         
         # Detect category from filename
         category = self._detect_category_from_filename(filename)
@@ -67,77 +333,27 @@ class WardrobeManager:
             "filename": filename,
             "category": category,
             "color": color,
-            "path": str(file_path.relative_to(self.wardrobe_path.parent)),
-            "description": f"{color.title()} {category}"
+            "path": os.path.join(self.wardrobe_path.name, filename),  # Relative to the wardrobe's parent
+            "description": f"{color.title()} {category}",
+            "analyzed_mtime_ns": stat.st_mtime_ns,
+            "analyzed_size": stat.st_size
         }
     
-    def _detect_category_from_filename(self, filename: str) -> str:
-        """Detect category from filename using enhanced pattern matching"""
-        filename_lower = filename.lower()
-        
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _detect_category_from_filename(filename: str) -> str:
+        """Detect category from filename using enhanced pattern matching (memoized per filename)"""
         # Remove file extension for better matching
-        name_without_ext = filename_lower.replace('.jpg', '').replace('.jpeg', '').replace('.png', '').replace('.gif', '').replace('.bmp', '').replace('.webp', '')
-        
-        # Enhanced pattern matching with priority order
-        
-        # T-shirts (check first before shirts)
-        if any(term in name_without_ext for term in ['tshirt', 't-shirt', 'tee']):
-            return 'tshirt'
-        
-        # Shirts (formal/casual shirts)
-        if any(term in name_without_ext for term in ['shirt', 'blouse']):
-            return 'shirt'
-        
-        # Suits (includes blazers, jackets)
-        if any(term in name_without_ext for term in ['suit', 'blazer', 'jacket', 'formal']):
-            return 'suit'
-        
-        # Jeans (specific type of pants)
-        if any(term in name_without_ext for term in ['jean', 'denim']):
-            return 'jeans'
-        
-        # Trousers/Pants (formal pants)
-        if any(term in name_without_ext for term in ['trouser', 'pant', 'chino', 'slack']):
-            return 'trousers'
-        
-        # Shoes (all footwear)
-        if any(term in name_without_ext for term in ['shoe', 'sneaker', 'boot', 'sandal', 'loafer', 'oxford', 'heel']):
-            return 'shoes'
-        
-        # Additional categories for completeness
-        if any(term in name_without_ext for term in ['dress', 'gown']):
-            return 'dress'
+        name_without_ext = os.path.splitext(filename)[0].lower()
         
-        if any(term in name_without_ext for term in ['skirt']):
-            return 'skirt'
-        
-        if any(term in name_without_ext for term in ['shorts']):
-            return 'shorts'
-        
-        if any(term in name_without_ext for term in ['hoodie', 'sweatshirt']):
-            return 'hoodie'
-        
-        if any(term in name_without_ext for term in ['sweater', 'pullover', 'cardigan']):
-            return 'sweater'
-        
-        # Fallback: try to infer from common numbered patterns
-        if re.match(r'^(shirt|tshirt|jean|trouser|shoe|suit)\d*$', name_without_ext):
-            base_name = re.sub(r'\d+$', '', name_without_ext)
-            return base_name if base_name in ['shirt', 'tshirt', 'jean', 'trouser', 'shoe', 'suit'] else 'unknown'
-        
-        # If filename contains category followed by number (e.g., "jeans1", "shirt2")
-        category_patterns = {
-            'tshirt': 'tshirt',
-            'shirt': 'shirt', 
-            'jean': 'jeans',
-            'trouser': 'trousers',
-            'shoe': 'shoes',
-            'suit': 'suit'
-        }
-        
-        for pattern, category in category_patterns.items():
-            if name_without_ext.startswith(pattern):
-                return category
+        # Enhanced pattern matching with priority order, using compiled regex scans
+        match = CATEGORY_REGEX.search(name_without_ext)
+        if match:
+            priority = min(
+                CATEGORY_PRIORITY[term.group(1)]
+                for term in CATEGORY_TERMS_REGEX.finditer(name_without_ext, match.start())
+            )
+            return CATEGORY_TERMS[priority][0]
         
         return 'unknown'
     
@@ -145,239 +361,168 @@ class WardrobeManager:
         """Detect dominant color from image using improved color analysis"""
         try:
             with Image.open(file_path) as img:
+                # Let libjpeg decode at a reduced DCT scale (no-op for other formats)
+                img.draft('RGB', (128, 128))
+                
                 # Convert to RGB if necessary
                 if img.mode != 'RGB':
                     img = img.convert('RGB')
                 
-                # Resize image for faster processing while maintaining detail
-                img = img.resize((300, 300))
+                # Shrink for faster processing; a few thousand pixels is plenty to find the dominant color
+                img.thumbnail((96, 96), Image.Resampling.BILINEAR)
                 
-                # Get pixel data
-                pixels = np.array(img)
-                pixels = pixels.reshape(-1, 3)
+                # Get pixel data as a flat uint8 buffer
+                pixels = np.asarray(img, dtype=np.uint8).reshape(-1, 3)
                 
                 # Remove background/white pixels that might interfere with clothing color detection
-                # Filter out very light pixels (likely background)
-                non_white_pixels = pixels[np.sum(pixels, axis=1) < 700]  # Remove near-white pixels
+                # Filter out very light pixels (likely background), summing in uint16 to avoid an upcast
+                candidates = np.flatnonzero(pixels.sum(axis=1, dtype=np.uint16) < 700)
                 
-                if len(non_white_pixels) < 100:  # If too few colored pixels, use all pixels
-                    non_white_pixels = pixels
+                if candidates.size < 100:  # If too few colored pixels, use all pixels
+                    candidates = np.arange(len(pixels))
                 
-                # Try to use K-means clustering for better color detection
-                try:
-                    from sklearn.cluster import KMeans
-                    
-                    # Use fewer clusters and samples for faster processing
-                    sample_size = min(1000, len(non_white_pixels))  # Limit sample size
-                    if sample_size < len(non_white_pixels):
-                        # Random sampling for faster processing
-                        indices = np.random.choice(len(non_white_pixels), sample_size, replace=False)
-                        sample_pixels = non_white_pixels[indices]
-                    else:
-                        sample_pixels = non_white_pixels
-                    
-                    # Find 3 dominant colors (reduced from 5)
-                    n_clusters = min(3, len(sample_pixels))
-                    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=3, max_iter=100)
-                    kmeans.fit(sample_pixels)
-                    
-                    # Get the cluster centers (dominant colors)
-                    dominant_colors = kmeans.cluster_centers_
-                    
-                    # Count pixels in each cluster
-                    labels = kmeans.labels_
-                    label_counts = np.bincount(labels)
-                    
-                    # Find the most prominent color (largest cluster)
-                    most_prominent_idx = np.argmax(label_counts)
-                    most_prominent_color = dominant_colors[most_prominent_idx]
-                    
-                    # Convert to color name
-                    return self._rgb_to_color_name(most_prominent_color)
-                    
-                except ImportError:
-                    # Fallback: Use histogram-based color detection
-                    return self._detect_color_histogram_method(non_white_pixels)
+                # Quantize to a 15-bit palette (5 bits per channel) and count each palette color
+                quantized = (pixels[candidates] >> 3).astype(np.uint16)
+                codes = (quantized[:, 0] << 10) | (quantized[:, 1] << 5) | quantized[:, 2]
+                most_common = np.bincount(codes, minlength=1 << 15).argmax()
+                
+                # Convert the center of the most common palette bin to a color name
+                dominant_color = (np.array([most_common >> 10, (most_common >> 5) & 31, most_common & 31]) << 3) + 4
+                return self._rgb_to_color_name(dominant_color)
                 
         except Exception as e:
             return "unknown"
     
-    def _detect_color_histogram_method(self, pixels: np.ndarray) -> str:
-        """Fallback color detection using histogram analysis"""
-        # Split into RGB channels
-        r_values = pixels[:, 0]
-        g_values = pixels[:, 1]
-        b_values = pixels[:, 2]
-        
-        # Create histograms for each channel
-        r_hist, _ = np.histogram(r_values, bins=32, range=(0, 255))
-        g_hist, _ = np.histogram(g_values, bins=32, range=(0, 255))
-        b_hist, _ = np.histogram(b_values, bins=32, range=(0, 255))
-        
-        # Find the most common color ranges
-        r_peak = np.argmax(r_hist) * 8  # Convert bin index to approximate RGB value
-        g_peak = np.argmax(g_hist) * 8
-        b_peak = np.argmax(b_hist) * 8
-        
-        # Use the peak values as the dominant color
-        dominant_color = np.array([r_peak, g_peak, b_peak])
-        
-        return self._rgb_to_color_name(dominant_color)
-    
     def _rgb_to_color_name(self, rgb: np.ndarray) -> str:
         """Convert RGB values to accurate color name using enhanced color mapping"""
-        r, g, b = rgb
-        
-        # Normalize RGB values
-        r, g, b = r / 255.0, g / 255.0, b / 255.0
-        
-        # Convert to HSV for better color classification
-        h, s, v = colorsys.rgb_to_hsv(r, g, b)
-        h = h * 360  # Convert to degrees
-        
-        # Enhanced color classification
-        
-        # Handle grayscale colors first
-        if s < 0.15:  # Low saturation = grayscale
-            if v < 0.2:
-                return "black"
-            elif v < 0.35:
-                return "dark gray"
-            elif v < 0.65:
-                return "gray"
-            elif v < 0.85:
-                return "light gray"
-            else:
-                return "white"
-        
-        # Handle very dark colors
-        if v < 0.25:
-            if s > 0.3:
-                if h < 30 or h > 330:
-                    return "dark red"
-                elif h < 90:
-                    return "dark brown"
-                elif h < 150:
-                    return "dark green"
-                elif h < 210:
-                    return "navy blue"
-                elif h < 270:
-                    return "dark purple"
-                else:
-                    return "dark red"
-            else:
-                return "black"
-        
-        # Handle bright/saturated colors
-        if s > 0.3:  # Colorful (not grayscale)
-            if h < 15 or h > 345:
-                if v > 0.8 and s > 0.6:
-                    return "bright red"
-                elif v > 0.6:
-                    return "red"
-                else:
-                    return "dark red"
-            elif h < 25:
-                return "red-orange"
-            elif h < 45:
-                if v > 0.7:
-                    return "orange"
-                else:
-                    return "brown"
-            elif h < 65:
-                if v > 0.8:
-                    return "yellow"
-                else:
-                    return "olive"
-            elif h < 85:
-                return "yellow-green"
-            elif h < 125:
-                if v > 0.6:
-                    return "green"
-                else:
-                    return "dark green"
-            elif h < 155:
-                return "teal"
-            elif h < 175:
-                return "cyan"
-            elif h < 195:
-                return "light blue"
-            elif h < 225:
-                if v > 0.6:
-                    return "blue"
-                else:
-                    return "navy blue"
-            elif h < 245:
-                return "blue-purple"
-            elif h < 275:
-                if v > 0.6:
-                    return "purple"
-                else:
-                    return "dark purple"
-            elif h < 295:
-                return "magenta"
-            elif h < 315:
-                return "pink"
-            elif h < 330:
-                return "rose"
-            else:
-                return "red"
-        
-        # Handle desaturated but not grayscale colors
+        # Normalize RGB values (as Python floats; NumPy scalar arithmetic is far slower)
+        r, g, b = (channel / 255.0 for channel in np.asarray(rgb, dtype=np.float64).tolist())
+        
+        # Convert to HSV for better color classification, with colorsys.rgb_to_hsv's
+        # arithmetic inlined to skip the call overhead
+        v = max(r, g, b)
+        range_c = v - min(r, g, b)
+        if range_c == 0:
+            return _classify_hsv(0.0, 0.0, v)
+        s = range_c / v
+        rc = (v - r) / range_c
+        gc = (v - g) / range_c
+        bc = (v - b) / range_c
+        if r == v:
+            h = bc - gc
+        elif g == v:
+            h = 2.0 + rc - bc
         else:
-            if h < 30 or h > 330:
-                return "light pink"
-            elif h < 60:
-                return "beige"
-            elif h < 90:
-                return "khaki"
-            elif h < 150:
-                return "sage green"
-            elif h < 210:
-                return "powder blue"
-            elif h < 270:
-                return "lavender"
-            else:
-                return "light pink"
+            h = 4.0 + gc - rc
+        return _classify_hsv((h / 6.0) % 1.0 * 360, s, v)  # Hue in degrees
+    
+    def _invalidate_reads(self):
+        """Drop the read snapshot and its columns after any write"""
+        self._snapshot = None
+        self._columns = None
+    
+    def _append_to_log(self, item: Dict):
+        """Record one added or updated item in the append-only log instead of rewriting metadata.json"""
+        self._invalidate_reads()
+        if self._log is None:
+            self._log = open(self.log_file, 'ab')
+        self._log.write(_json_dumps(item, newline=True))
+        self._log.flush()
     
     def _save_metadata(self):
-        """Save metadata to JSON file"""
-        with open(self.metadata_file, 'w') as f:
-            json.dump(self.metadata, f, indent=2)
+        """Save (compact) metadata to JSON file and empty the log it now includes"""
+        self._invalidate_reads()
+        self.metadata_file.write_bytes(_json_dumps(self.metadata))
+        
+        # Truncate rather than delete, so the folder mtime doesn't move past the save
+        if self._log is not None:
+            self._log.truncate(0)
+        elif self.log_file.exists():
+            open(self.log_file, 'wb').close()
+    
+    def close(self):
+        """Compact any logged writes into metadata.json and close the log"""
+        with self._write_lock:
+            if self._log is None and not (self.log_file.exists() and self.log_file.stat().st_size):
+                return
+            self._save_metadata()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
     
-    def add_new_item(self, filename: str, file_path: Path) -> Dict:
-        """Add new item to wardrobe and metadata"""
+    def add_new_item(self, filename: str, file_path: Path, category: Optional[str] = None) -> Dict:
+        """Add new item to wardrobe and metadata, optionally overriding the detected category"""
         item_data = self._analyze_image(file_path)
         item_data["filename"] = filename
         
-        self.metadata["items"].append(item_data)
-        self._save_metadata()
+        if category:
+            item_data["category"] = category
+            # Update description with new category
+            item_data["description"] = f"{item_data['color'].title()} {category}"
+        
+        with self._write_lock:
+            # A concurrent regenerate may already have picked the file up; replace that entry
+            for i, item in enumerate(self._items):
+                if item["filename"] == filename:
+                    item_data["id"] = item["id"]
+                    self._items[i] = item_data
+                    self._unindex_item(item)
+                    break
+            else:
+                self._items.append(item_data)
+            self._index_item(item_data)
+            self._append_to_log(item_data)
         
         return item_data
     
-    def get_all_items(self) -> List[Dict]:
-        """Get all wardrobe items"""
-        return self.metadata.get("items", [])
+    @property
+    def count(self) -> int:
+        """Number of wardrobe items"""
+        return len(self._items)
+    
+    def get_all_items(self) -> Tuple[Dict, ...]:
+        """Get all wardrobe items as a read-only snapshot, rebuilt only after writes"""
+        if self._snapshot is None:
+            self._snapshot = tuple(self._items)
+        return self._snapshot
+    
+    def _get_columns(self) -> Tuple[Tuple[Dict, ...], np.ndarray, np.ndarray]:
+        """Get the snapshot with its colors and search texts as string arrays for vectorized filters"""
+        if self._columns is None:
+            items = self.get_all_items()
+            colors = np.array([item.get("color", "").lower() for item in items], dtype=str)
+            # Search in category, color, description, filename
+            search_texts = np.array([
+                f"{item.get('category', '')} {item.get('color', '')} {item.get('description', '')} {item.get('filename', '')}".lower()
+                for item in items
+            ], dtype=str)
+            self._columns = (items, colors, search_texts)
+        return self._columns
+    
+    def get_item(self, item_id: str) -> Optional[Dict]:
+        """Get a single item by ID"""
+        return self._by_id.get(item_id)
     
     def get_items_by_category(self, category: str) -> List[Dict]:
         """Get items filtered by category"""
-        return [item for item in self.metadata.get("items", []) if item.get("category") == category]
+        return self._by_category.get(category, [])[:]
     
     def get_items_by_color(self, color: str) -> List[Dict]:
-        """Get items filtered by color"""
-        return [item for item in self.metadata.get("items", []) if color.lower() in item.get("color", "").lower()]
+        """Get items filtered by color, matching any color name that contains it (e.g. red -> dark red)"""
+        items, colors, _ = self._get_columns()
+        return [items[i] for i in np.flatnonzero(np.strings.find(colors, color.lower()) >= 0)]
     
     def suggest_outfit(self, preferences: Dict = None) -> Dict:
         """Suggest a random outfit combination"""
         import random
         
-        # Get available items by category
-        shirts = self.get_items_by_category("shirt")
-        tshirts = self.get_items_by_category("tshirt")
-        jeans = self.get_items_by_category("jeans")
-        trousers = self.get_items_by_category("trousers")
-        shoes = self.get_items_by_category("shoes")
-        suits = self.get_items_by_category("suit")
+        # Get available items by category (index lists, read without copying)
+        shirts = self._by_category.get("shirt", [])
+        tshirts = self._by_category.get("tshirt", [])
+        jeans = self._by_category.get("jeans", [])
+        trousers = self._by_category.get("trousers", [])
+        shoes = self._by_category.get("shoes", [])
+        suits = self._by_category.get("suit", [])
         
         outfit = {"items": [], "description": ""}
         
@@ -396,16 +541,15 @@ class WardrobeManager:
         else:
             # Casual outfit: (shirt/tshirt) + (jeans/trousers) + shoes
             
-            # Choose top
-            tops = shirts + tshirts
-            if tops:
-                top = random.choice(tops)
+            # Choose top: pick a category weighted by its size, then an item in it, which is
+            # uniform over shirts + tshirts without building the combined list
+            if shirts or tshirts:
+                top = random.choice(random.choices([shirts, tshirts], weights=[len(shirts), len(tshirts)])[0])
                 outfit["items"].append(top)
             
-            # Choose bottom
-            bottoms = jeans + trousers
-            if bottoms:
-                bottom = random.choice(bottoms)
+            # Choose bottom (same weighted pick over jeans + trousers)
+            if jeans or trousers:
+                bottom = random.choice(random.choices([jeans, trousers], weights=[len(jeans), len(trousers)])[0])
                 outfit["items"].append(bottom)
             
             # Choose shoes
@@ -421,17 +565,57 @@ class WardrobeManager:
         
         return outfit
     
-    def regenerate_metadata(self):
-        """Regenerate metadata for all items with improved analysis"""
-        # Clear existing metadata
-        self.metadata = {"items": []}
+    def regenerate_metadata(self) -> Tuple[int, int]:
+        """Re-analyze items whose image changed (mtime or size) since it was last analyzed.
         
-        # Rescan all items
-        self._scan_wardrobe_folder()
+        Returns (reanalyzed, skipped) counts. Items whose file is gone are dropped.
+        """
+        with self._write_lock:
+            return self._regenerate_metadata_locked()
+    
+    def _regenerate_metadata_locked(self) -> Tuple[int, int]:
+        self.wardrobe_path.mkdir(parents=True, exist_ok=True)
+        existing = {item["filename"]: item for item in self._items}
+        items = []
+        changed = []  # (position in items, previous item, path, stat) for images to re-analyze
+        skipped = 0
+        
+        with os.scandir(self.wardrobe_path) as entries:
+            for entry in entries:
+                if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                
+                item = existing.get(entry.name)
+                stat = entry.stat()
+                if (item and stat.st_mtime_ns == item.get("analyzed_mtime_ns")
+                        and stat.st_size == item.get("analyzed_size")):
+                    items.append(item)
+                    skipped += 1
+                    continue
+                
+                changed.append((len(items), item, Path(entry.path), stat))
+                items.append(item)
+        
+        if changed:
+            analyzed = self._analyze_images([(path, stat) for _, _, path, stat in changed])
+            for (position, item, _, _), updated_item in zip(changed, analyzed):
+                if item:
+                    updated_item["id"] = item["id"]  # Keep the same ID
+                items[position] = updated_item
+        
+        self.metadata = {"items": items}
+        self._rebuild_indexes()
+        self._save_metadata()
+        
+        return len(changed), skipped
     
     def update_item_analysis(self, item_id: str) -> Dict:
         """Update analysis for a specific item"""
-        for i, item in enumerate(self.metadata.get("items", [])):
+        with self._write_lock:
+            return self._update_item_analysis_locked(item_id)
+    
+    def _update_item_analysis_locked(self, item_id: str) -> Dict:
+        for i, item in enumerate(self._items):
             if item.get("id") == item_id:
                 # Re-analyze the item
                 file_path = self.wardrobe_path / item["filename"]
@@ -441,8 +625,10 @@ class WardrobeManager:
                     updated_item["filename"] = item["filename"]  # Keep the same filename
                     
                     # Update the item in metadata
-                    self.metadata["items"][i] = updated_item
-                    self._save_metadata()
+                    self._items[i] = updated_item
+                    self._unindex_item(item)
+                    self._index_item(updated_item)
+                    self._append_to_log(updated_item)
                     
                     return updated_item
         
@@ -450,14 +636,11 @@ class WardrobeManager:
     
     def search_items(self, query: str) -> List[Dict]:
         """Search items based on query"""
-        query_lower = query.lower()
-        results = []
+        items, _, search_texts = self._get_columns()
         
-        for item in self.metadata.get("items", []):
-            # Search in category, color, description, filename
-            searchable_text = f"{item.get('category', '')} {item.get('color', '')} {item.get('description', '')} {item.get('filename', '')}".lower()
-            
-            if any(term in searchable_text for term in query_lower.split()):
-                results.append(item)
+        # An item matches if its text contains any query term
+        matches = np.zeros(len(items), dtype=bool)
+        for term in query.lower().split():
+            matches |= np.strings.find(search_texts, term) >= 0
         
-        return results
+        return [items[i] for i in np.flatnonzero(matches)]